@@ -4,17 +4,21 @@ PsychoGuard AI — FastAPI backend
 Run: uvicorn app:app --host 0.0.0.0 --port 8000 --reload
 """
 
+import asyncio
+import os
 import time
 from typing import Optional
 
+import httpx
+import numpy as np
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response
 from pydantic import BaseModel
 
-from model import detector
+from model import detector, TACTIC_LABELS
 from llm_analyzer import generate_explanation
-from multimodal import analyze_image_caption, analyze_clickbait
+from multimodal import analyze_image_caption, analyze_clickbait, start_encode_batcher, warmup_clip
 from report_gen import generate_report
 
 # ── App setup ─────────────────────────────────────────────────────────────────
@@ -28,6 +32,107 @@ app.add_middleware(
 )
 
 
+# ── Dynamic batcher ───────────────────────────────────────────────────────────
+# Concurrent /analyze and /quick-score requests are coalesced into a single
+# classifier forward pass: callers enqueue (text, future), a background loop
+# drains the queue up to MAX_BATCH_SIZE within a BATCH_WINDOW, runs one
+# detector.analyze_batch call, and resolves each future with its result.
+MAX_BATCH_SIZE = 8
+BATCH_WINDOW   = 0.05   # seconds to wait for stragglers
+
+# Optional dedicated inference server (set PSYGUARD_MODEL_URL to a zero-shot
+# endpoint, e.g. `transformers serve` or MLServer). Chunk batches are POSTed
+# there so API workers stay light and share one model copy; the in-process
+# detector remains the dev fallback.
+MODEL_URL = os.environ.get("PSYGUARD_MODEL_URL", "")
+
+_batch_queue: Optional[asyncio.Queue] = None
+
+
+def _remote_scores(chunks: list) -> np.ndarray:
+    """Score chunks against the tactic labels on the dedicated model server.
+
+    Runs inside the batch loop's worker thread, so a sync client is fine.
+    """
+    resp = httpx.post(
+        MODEL_URL,
+        json={
+            "inputs":     chunks,
+            "parameters": {"candidate_labels": TACTIC_LABELS, "multi_label": True},
+        },
+        timeout=30.0,
+    )
+    resp.raise_for_status()
+    payload = resp.json()
+    if isinstance(payload, dict):
+        payload = [payload]
+    rows = []
+    for item in payload:
+        scores = dict(zip(item["labels"], item["scores"]))
+        rows.append([scores.get(label, 0.0) for label in TACTIC_LABELS])
+    return np.array(rows, dtype=np.float32)
+
+
+async def _batch_loop():
+    loop = asyncio.get_running_loop()
+    while True:
+        items = [await _batch_queue.get()]
+        deadline = loop.time() + BATCH_WINDOW
+        while len(items) < MAX_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(_batch_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        texts = [text for text, _ in items]
+        try:
+            # Run inference in a worker thread so the event loop stays free
+            if MODEL_URL:
+                try:
+                    analyses = await asyncio.to_thread(
+                        detector.analyze_batch, texts, _remote_scores
+                    )
+                except Exception as exc:
+                    print(f"[Batcher] Model server failed, using local model: {exc}")
+                    analyses = await asyncio.to_thread(detector.analyze_batch, texts)
+            else:
+                analyses = await asyncio.to_thread(detector.analyze_batch, texts)
+        except Exception as exc:
+            for _, fut in items:
+                if not fut.done():
+                    fut.set_exception(exc)
+            continue
+
+        for (_, fut), analysis in zip(items, analyses):
+            if not fut.done():
+                fut.set_result(analysis)
+
+
+async def _analyze_batched(text: str) -> dict:
+    if _batch_queue is None:            # startup hook not run (e.g. tests)
+        return detector.analyze_text(text)
+    fut = asyncio.get_running_loop().create_future()
+    await _batch_queue.put((text, fut))
+    return await fut
+
+
+@app.on_event("startup")
+async def _start_batcher():
+    global _batch_queue
+    _batch_queue = asyncio.Queue()
+    asyncio.create_task(_batch_loop())
+    start_encode_batcher()
+
+    # Warm both models so the first user request pays only steady-state cost.
+    # The detector warms once at import too, but a realistic-length text here
+    # also covers the batched shape torch.compile will see in production.
+    await asyncio.to_thread(detector.analyze_text, "warmup text " * 20)
+    await asyncio.to_thread(warmup_clip)
+
+
 # ── Request/Response schemas ──────────────────────────────────────────────────
 class AnalyzeRequest(BaseModel):
     text: str
@@ -50,32 +155,39 @@ def health():
 
 
 @app.post("/analyze")
-def analyze(req: AnalyzeRequest):
+async def analyze(req: AnalyzeRequest):
     if not req.text or len(req.text.strip()) < 10:
         raise HTTPException(status_code=400, detail="Text must be at least 10 characters.")
 
     start = time.time()
 
-    # 1. Transformer classification
-    analysis = detector.analyze_text(req.text)
-
-    # 2. Sentence-level heatmap
-    highlights = []
-    if req.include_highlights:
-        highlights = detector.highlight_sentences(req.text)
-
-    # 3. LLM explanation via Claude
-    explanation = {"success": False, "full_explanation": "LLM disabled", "sections": {}}
-    if req.include_explanation:
-        explanation = generate_explanation(req.text, analysis)
-
-    # 4. Multimodal analysis
-    multimodal: dict = {"available": False}
+    # Stage 1: transformer classification and multimodal analysis are
+    # independent — kick both off together
+    analysis_task = asyncio.ensure_future(_analyze_batched(req.text))
+    multimodal_task = None
     if req.image_url:
         if req.caption:
-            multimodal = analyze_image_caption(req.image_url, req.caption)
+            multimodal_task = asyncio.ensure_future(
+                analyze_image_caption(req.image_url, req.caption))
         else:
-            multimodal = analyze_clickbait(req.image_url)
+            multimodal_task = asyncio.ensure_future(
+                analyze_clickbait(req.image_url))
+
+    analysis = await analysis_task
+
+    # Stage 2: heatmap and Claude explanation (which needs the score) in parallel
+    async def _highlights():
+        if not req.include_highlights:
+            return []
+        return await asyncio.to_thread(detector.highlight_sentences, req.text)
+
+    async def _explanation():
+        if not req.include_explanation:
+            return {"success": False, "full_explanation": "LLM disabled", "sections": {}}
+        return await asyncio.to_thread(generate_explanation, req.text, analysis)
+
+    highlights, explanation = await asyncio.gather(_highlights(), _explanation())
+    multimodal = (await multimodal_task) if multimodal_task else {"available": False}
 
     return {
         "analysis":        analysis,
@@ -87,9 +199,9 @@ def analyze(req: AnalyzeRequest):
 
 
 @app.post("/quick-score")
-def quick_score(req: AnalyzeRequest):
+async def quick_score(req: AnalyzeRequest):
     """Lightweight endpoint used by the browser extension."""
-    analysis = detector.analyze_text(req.text)
+    analysis = await _analyze_batched(req.text)
     return {
         "overall_score": analysis["overall_score"],
         "severity":      analysis["severity"],
@@ -99,17 +211,19 @@ def quick_score(req: AnalyzeRequest):
 
 
 @app.post("/report")
-def download_report(req: AnalyzeRequest):
+async def download_report(req: AnalyzeRequest):
     """Generate and return a PDF analysis report."""
     if not req.text or len(req.text.strip()) < 10:
         raise HTTPException(status_code=400, detail="Text too short.")
 
-    analysis    = detector.analyze_text(req.text)
-    explanation = generate_explanation(req.text, analysis)
-    pdf_buf     = generate_report(req.text, analysis, explanation, req.url or "")
+    analysis    = await _analyze_batched(req.text)
+    explanation = await asyncio.to_thread(generate_explanation, req.text, analysis)
+    pdf_buf     = await asyncio.to_thread(generate_report, req.text, analysis, explanation, req.url or "")
 
-    return StreamingResponse(
-        pdf_buf,
+    # The PDF is already fully in memory — a plain Response avoids Starlette
+    # iterating the BytesIO in tiny chunks through the threadpool
+    return Response(
+        content=pdf_buf.getvalue(),
         media_type="application/pdf",
         headers={"Content-Disposition": 'attachment; filename="psychoguard-report.pdf"'}
     )
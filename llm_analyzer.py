@@ -4,11 +4,22 @@ Uses Claude API to generate human-readable manipulation explanations.
 Falls back gracefully if API key is not set.
 """
 
+import hashlib
 import os
+import re
+import time
+from collections import OrderedDict
+
 import anthropic
 
 _client = None
 
+# Cache Claude explanations keyed on (text hash, score bucket) — identical
+# texts skip the API round-trip (and its token cost) for an hour.
+_CACHE_SIZE = 1024
+_CACHE_TTL  = 3600.0
+_cache: OrderedDict = OrderedDict()   # key -> (timestamp, result)
+
 def _get_client():
     global _client
     if _client is None:
@@ -32,6 +43,11 @@ def generate_explanation(text: str, analysis: dict) -> dict:
     score         = analysis.get("overall_score", 0)
     tactic_summary = ", ".join(analysis.get("top_tactics", [])) or "none"
 
+    cache_key = (hashlib.sha256(text.encode("utf-8")).hexdigest(), int(score // 10))
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
+
     prompt = f"""You are a media-literacy expert specialising in psychological manipulation.
 
 The automated transformer scored this text {score}/100 for manipulation.
@@ -60,11 +76,13 @@ Rules:
             messages=[{"role": "user", "content": prompt}]
         )
         explanation = response.content[0].text
-        return {
+        result = {
             "success":          True,
             "full_explanation": explanation,
             "sections":         _parse_sections(explanation)
         }
+        _cache_put(cache_key, result)
+        return result
     except Exception as exc:
         return {
             "success":          False,
@@ -73,16 +91,41 @@ Rules:
         }
 
 
+def _cache_get(key):
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    ts, result = entry
+    if time.time() - ts > _CACHE_TTL:
+        del _cache[key]
+        return None
+    _cache.move_to_end(key)
+    return result
+
+
+def _cache_put(key, result: dict):
+    _cache[key] = (time.time(), result)
+    _cache.move_to_end(key)
+    while len(_cache) > _CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+# Matches any of the five expected headings at line start, compiled once
+_HEAD_RE = re.compile(
+    r'^(SUMMARY|KEY TACTICS|PSYCHOLOGICAL MECHANISM|WHAT TO WATCH OUT FOR|VERDICT)\b',
+    re.IGNORECASE
+)
+
+
 def _parse_sections(text: str) -> dict:
-    headings = ["SUMMARY", "KEY TACTICS", "PSYCHOLOGICAL MECHANISM",
-                "WHAT TO WATCH OUT FOR", "VERDICT"]
     sections: dict = {}
     current = None
     buf: list = []
 
     for line in text.splitlines():
         stripped = line.strip()
-        matched = next((h for h in headings if stripped.upper().startswith(h)), None)
+        m = _HEAD_RE.match(stripped)
+        matched = m.group(1).upper() if m else None
         if matched:
             if current:
                 sections[current] = " ".join(buf).strip()
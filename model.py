@@ -5,10 +5,17 @@ Uses facebook/bart-large-mnli for zero-shot multi-label classification
 No fine-tuning needed — works out of the box for hackathon
 """
 
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+
 import torch
 import numpy as np
-import re
-from transformers import pipeline
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
 
 # ── Manipulation Tactic Labels ──────────────────────────────────────────────
 TACTIC_LABELS = [
@@ -39,46 +46,253 @@ TACTIC_COLORS = {
 }
 
 
+# Sentence boundary split, compiled once
+_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# ── Result cache ────────────────────────────────────────────────────────────
+# analyze results are pure functions of the input text, so repeated pastes
+# skip the transformer entirely. Exact-hash LRU with a TTL against staleness.
+CACHE_SIZE = 1024
+CACHE_TTL  = 3600.0   # seconds
+
+# On-disk copy of the cache so a restart/redeploy doesn't start cold
+CACHE_DB     = "psychoguard_cache.db"
+CACHE_DB_TTL = 86400.0   # seconds
+
+
 class ManipulationDetector:
     def __init__(self):
-        self.device = 0 if torch.cuda.is_available() else -1
-        print(f"[Model] Loading zero-shot classifier on {'GPU' if self.device == 0 else 'CPU'}...")
-        self.classifier = pipeline(
-            "zero-shot-classification",
-            model="facebook/bart-large-mnli",
-            device=self.device
-        )
+        self._cache: OrderedDict = OrderedDict()   # sha256(text) -> (timestamp, result)
+        self._db = self._open_cache_db()
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        print(f"[Model] Loading zero-shot classifier on {self.device.upper()}...")
+        self.tokenizer = AutoTokenizer.from_pretrained("facebook/bart-large-mnli")
+
+        self.backend = "torch"
+        if os.environ.get("PSYGUARD_ONNX") == "1":
+            self._load_onnx()
+        if self.backend != "onnx":
+            self._load_torch()
+
+        # Hypothesis strings and MNLI label indices are fixed — build them once
+        self._hypotheses = [f"This example is {label}." for label in TACTIC_LABELS]
+        label2id         = {k.lower(): v for k, v in self.model.config.label2id.items()}
+        self._entail_idx = label2id.get("entailment", 2)
+        self._contra_idx = label2id.get("contradiction", 0)
+
+        # Dummy forward so compile/kernel-autotune cost is paid at startup,
+        # not by the first user request
+        self._nli_scores(["warmup"])
         print("[Model] Ready!")
 
+    # ── Backends ─────────────────────────────────────────────────────────────
+    def _load_onnx(self):
+        """Opt-in ONNX Runtime backend (set PSYGUARD_ONNX=1).
+
+        Exports the model through Optimum so ONNX Runtime can apply constant
+        folding and op fusion — typically 2-4x faster than eager PyTorch on
+        the CPU deployment path. Falls back to PyTorch if optimum[onnxruntime]
+        is not installed.
+        """
+        try:
+            import onnxruntime as ort
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+
+            print("[Model] Exporting to ONNX Runtime...")
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = os.cpu_count() or 1
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self.model = ORTModelForSequenceClassification.from_pretrained(
+                "facebook/bart-large-mnli",
+                export=True,
+                provider="CUDAExecutionProvider" if self.device == "cuda" else "CPUExecutionProvider",
+                session_options=options
+            )
+            self.backend = "onnx"
+            print("[Model] ONNX Runtime backend ready")
+        except Exception as exc:
+            print(f"[Model] ONNX backend unavailable, falling back to PyTorch: {exc}")
+
+    def _load_torch(self):
+        if self.device == "cuda":
+            # FP16 halves weight traffic — BART inference is memory-bandwidth-bound
+            self.model = AutoModelForSequenceClassification.from_pretrained(
+                "facebook/bart-large-mnli",
+                torch_dtype=torch.float16,
+                attn_implementation="sdpa"    # fused scaled-dot-product attention
+            ).to(self.device).eval()
+            try:
+                self.model = torch.compile(self.model, mode="reduce-overhead")
+            except Exception as exc:
+                print(f"[Model] torch.compile unavailable, running eager: {exc}")
+        else:
+            # On CPU, dynamic INT8 quantization of the Linear layers gives the
+            # bandwidth win instead (FP16 matmuls are slow on most CPUs)
+            model = AutoModelForSequenceClassification.from_pretrained(
+                "facebook/bart-large-mnli",
+                attn_implementation="sdpa"
+            ).eval()
+            try:
+                self.model = torch.ao.quantization.quantize_dynamic(
+                    model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+                print("[Model] Dynamic INT8 quantization applied")
+            except Exception as exc:
+                print(f"[Model] INT8 quantization unavailable, running FP32: {exc}")
+                self.model = model
+
+    # ── NLI scoring ──────────────────────────────────────────────────────────
+    def _nli_scores(self, premises: list, multi_label: bool = True) -> np.ndarray:
+        """Score every premise against all tactic hypotheses in one forward pass.
+
+        Builds the (premise, hypothesis) cross-product, tokenizes it as a
+        single padded batch, and returns entailment scores of shape
+        (len(premises), len(TACTIC_LABELS)). multi_label=True softmaxes
+        (contradiction, entailment) per pair; multi_label=False softmaxes
+        entailment logits across the labels — matching the zero-shot
+        pipeline's behaviour without its per-call overhead.
+        """
+        pair_premises  = [p for p in premises for _ in TACTIC_LABELS]
+        pair_hypotheses = self._hypotheses * len(premises)
+        inputs = self.tokenizer(
+            pair_premises, pair_hypotheses,
+            padding=True, truncation="only_first", return_tensors="pt"
+        ).to(self.device)
+
+        with torch.inference_mode():
+            logits = self.model(**inputs).logits
+
+        if multi_label:
+            pair = logits[:, [self._contra_idx, self._entail_idx]]
+            scores = pair.softmax(dim=-1)[:, 1].view(len(premises), len(TACTIC_LABELS))
+        else:
+            ent = logits[:, self._entail_idx].view(len(premises), len(TACTIC_LABELS))
+            scores = ent.softmax(dim=-1)
+        return scores.float().cpu().numpy()
+
     # ── Main Analysis ────────────────────────────────────────────────────────
     def analyze_text(self, text: str) -> dict:
-        if not text or len(text.strip()) < 10:
-            return self._empty_result()
+        return self.analyze_batch([text])[0]
 
-        chunks = self._chunk_text(text)
-        all_scores = []
+    def analyze_batch(self, texts: list, score_fn=None) -> list:
+        """Analyze several texts with one merged classifier call.
 
-        for chunk in chunks[:5]:          # cap at 5 chunks for speed
-            result = self.classifier(
-                chunk,
-                candidate_labels=TACTIC_LABELS,
-                multi_label=True
+        All chunks from all texts are flattened into a single batched
+        forward pass, then aggregated back per text. score_fn optionally
+        replaces the local NLI scorer (e.g. with a call to a dedicated
+        inference server); it receives the flattened chunk list and must
+        return an array of shape (n_chunks, n_labels).
+        """
+        flat_chunks = []
+        spans = []          # per text: None = too short, dict = cache hit, tuple = to classify
+        for text in texts:
+            if not text or len(text.strip()) < 10:
+                spans.append(None)
+                continue
+            key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            hit = self._cache_get(key)
+            if hit is not None:
+                spans.append(hit)
+                continue
+            chunks = self._chunk_text(text)[:5]   # cap at 5 chunks for speed
+            spans.append((key, len(flat_chunks), len(chunks)))
+            flat_chunks.extend(chunks)
+
+        score_mat = None
+        if flat_chunks:
+            # (n_chunks_total, n_labels) — kept as an array so aggregation stays vectorized
+            if score_fn is not None:
+                score_mat = np.asarray(score_fn(flat_chunks), dtype=np.float32)
+            else:
+                score_mat = self._nli_scores(flat_chunks, multi_label=True)
+
+        outputs = []
+        for text, span in zip(texts, spans):
+            if span is None:
+                outputs.append(self._empty_result())
+                continue
+            if isinstance(span, dict):            # cache hit
+                outputs.append(span)
+                continue
+            key, offset, n_chunks = span
+            result = self._aggregate(
+                score_mat[offset:offset + n_chunks], n_chunks, len(text.split())
             )
-            scores = dict(zip(result["labels"], result["scores"]))
-            all_scores.append(scores)
+            self._cache_put(key, result)
+            outputs.append(result)
+        return outputs
 
-        # Average across chunks
-        tactic_scores = {
-            label: float(np.mean([s.get(label, 0) for s in all_scores]))
-            for label in TACTIC_LABELS
-        }
+    # ── Cache helpers ────────────────────────────────────────────────────────
+    def _open_cache_db(self):
+        """Open (or create) the persistent cache, pruning stale rows."""
+        try:
+            db = sqlite3.connect(CACHE_DB, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_cache "
+                "(text_hash TEXT PRIMARY KEY, response TEXT, ts REAL)"
+            )
+            db.execute(
+                "DELETE FROM analysis_cache WHERE ts < ?",
+                (time.time() - CACHE_DB_TTL,)
+            )
+            db.commit()
+            return db
+        except Exception as exc:
+            print(f"[Model] Persistent cache unavailable: {exc}")
+            return None
+
+    def _cache_get(self, key: str):
+        entry = self._cache.get(key)
+        if entry is not None:
+            ts, result = entry
+            if time.time() - ts <= CACHE_TTL:
+                self._cache.move_to_end(key)
+                return result
+            del self._cache[key]
+
+        # Miss in memory — check the on-disk cache (warm after restarts)
+        if self._db is not None:
+            try:
+                row = self._db.execute(
+                    "SELECT response, ts FROM analysis_cache WHERE text_hash = ?",
+                    (key,)
+                ).fetchone()
+            except Exception:
+                row = None
+            if row and time.time() - row[1] <= CACHE_DB_TTL:
+                result = json.loads(row[0])
+                self._mem_put(key, result)
+                return result
+        return None
+
+    def _cache_put(self, key: str, result: dict):
+        self._mem_put(key, result)
+        if self._db is not None:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO analysis_cache VALUES (?, ?, ?)",
+                    (key, json.dumps(result), time.time())
+                )
+                self._db.commit()
+            except Exception:
+                pass    # disk cache is best-effort
+
+    def _mem_put(self, key: str, result: dict):
+        self._cache[key] = (time.time(), result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def _aggregate(self, score_rows: np.ndarray, n_chunks: int, word_count: int) -> dict:
+        # Average across chunks — one vectorized reduction over (n_chunks, n_labels)
+        tactic_means = score_rows.mean(axis=0)
 
         # Scale 0-100 with sensitivity boost
-        raw = float(np.mean(list(tactic_scores.values())))
+        raw = float(tactic_means.mean())
         overall = min(100.0, raw * 180)
 
-        sorted_tactics = sorted(tactic_scores.items(), key=lambda x: x[1], reverse=True)
-        top_tactics = [t for t, s in sorted_tactics if s > 0.25]
+        order = np.argsort(-tactic_means)
+        top_tactics = [TACTIC_LABELS[i] for i in order if tactic_means[i] > 0.25][:3]
 
         if overall >= 70:
             severity, sev_color = "HIGH",     "#ef4444"
@@ -91,39 +305,42 @@ class ManipulationDetector:
             "overall_score":       round(overall, 1),
             "severity":            severity,
             "severity_color":      sev_color,
-            "tactic_scores":       {k: round(v * 100, 1) for k, v in tactic_scores.items()},
+            "tactic_scores":       dict(zip(TACTIC_LABELS, (tactic_means * 100).round(1).tolist())),
             "tactic_colors":       TACTIC_COLORS,
-            "top_tactics":         top_tactics[:3],
+            "top_tactics":         top_tactics,
             "tactic_descriptions": TACTIC_DESCRIPTIONS,
-            "chunks_analyzed":     len(chunks[:5]),
-            "word_count":          len(text.split())
+            "chunks_analyzed":     n_chunks,
+            "word_count":          word_count
         }
 
     # ── Sentence Heatmap ─────────────────────────────────────────────────────
     def highlight_sentences(self, text: str) -> list:
-        sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-        results = []
+        sentences = _SPLIT_RE.split(text.strip())[:20]
+        results   = [{"text": s, "score": 0.0, "tactic": None} for s in sentences]
 
-        for sent in sentences[:20]:
-            if len(sent.split()) < 4:
-                results.append({"text": sent, "score": 0.0, "tactic": None})
-                continue
-            try:
-                res = self.classifier(
-                    sent,
-                    candidate_labels=TACTIC_LABELS,
-                    multi_label=False
-                )
-                top_score = float(res["scores"][0])
-                top_label = res["labels"][0]
+        # Batch every sentence long enough to classify into a single forward
+        # pass; short ones keep their zero default and never reach the model
+        eligible, batch = [], []
+        for i, sent in enumerate(sentences):
+            if len(sent.split()) >= 4:
+                eligible.append(i)
+                batch.append(sent)
+        if not eligible:
+            return results
+
+        try:
+            score_mat = self._nli_scores(batch, multi_label=False)
+            for i, row in zip(eligible, score_mat):
+                top_idx   = int(row.argmax())
+                top_score = float(row[top_idx])
                 scaled    = min(1.0, top_score * 1.8)
-                results.append({
-                    "text":   sent,
+                results[i] = {
+                    "text":   sentences[i],
                     "score":  round(scaled, 3),
-                    "tactic": top_label if top_score > 0.3 else None
-                })
-            except Exception:
-                results.append({"text": sent, "score": 0.0, "tactic": None})
+                    "tactic": TACTIC_LABELS[top_idx] if top_score > 0.3 else None
+                }
+        except Exception:
+            pass    # leave unscored defaults on classifier failure
 
         return results
 
@@ -25,9 +25,63 @@ C_SURFACE = HexColor("#f8fafc")
 C_GRAY    = HexColor("#64748b")
 C_BORDER  = HexColor("#e2e8f0")
 
-
-def _sty(name, **kw) -> ParagraphStyle:
-    return ParagraphStyle(name, **kw)
+# ── Styles (built once at import — generate_report runs per request) ──────────
+S_TITLE    = ParagraphStyle("H",    fontSize=22, fontName="Helvetica-Bold",
+                            textColor=C_DARK, spaceAfter=4)
+S_SUBTITLE = ParagraphStyle("Sub",  fontSize=9,  fontName="Helvetica",
+                            textColor=C_GRAY, spaceAfter=14)
+S_TABLE_HDR = ParagraphStyle("th",  fontSize=9,  fontName="Helvetica-Bold",
+                             textColor=C_GRAY, alignment=TA_CENTER)
+S_SECTION  = ParagraphStyle("SH",   fontSize=13, fontName="Helvetica-Bold",
+                            textColor=C_DARK, spaceAfter=8)
+S_SECTION_SM = ParagraphStyle("SH3", fontSize=11, fontName="Helvetica-Bold",
+                              textColor=C_DARK, spaceAfter=6)
+S_SEC_HEAD = ParagraphStyle("sec",  fontSize=10, fontName="Helvetica-Bold",
+                            textColor=C_ACCENT, spaceAfter=3)
+S_BODY     = ParagraphStyle("body", fontSize=10, fontName="Helvetica",
+                            textColor=HexColor("#374151"), leading=15, spaceAfter=6)
+S_EXCERPT  = ParagraphStyle("exc",  fontSize=9,  fontName="Helvetica",
+                            textColor=C_GRAY, leading=13,
+                            backColor=C_SURFACE, leftIndent=8, rightIndent=8,
+                            borderPadding=8)
+S_URL      = ParagraphStyle("url",  fontSize=8,  textColor=C_GRAY)
+S_FOOTER   = ParagraphStyle("foot", fontSize=7,  textColor=C_GRAY,
+                            alignment=TA_CENTER)
+
+# Big score values — colour tracks severity, so keep one style per severity
+_S_VALUE = {
+    "HIGH":     ParagraphStyle("tvH", fontSize=34, fontName="Helvetica-Bold",
+                               textColor=C_RED, alignment=TA_CENTER),
+    "MODERATE": ParagraphStyle("tvM", fontSize=34, fontName="Helvetica-Bold",
+                               textColor=C_AMBER, alignment=TA_CENTER),
+    "LOW":      ParagraphStyle("tvL", fontSize=34, fontName="Helvetica-Bold",
+                               textColor=C_GREEN, alignment=TA_CENTER),
+}
+S_VALUE_ACCENT = ParagraphStyle("tv2", fontSize=34, fontName="Helvetica-Bold",
+                                textColor=C_ACCENT, alignment=TA_CENTER)
+
+OV_TABLE_STYLE = TableStyle([
+    ("BACKGROUND",   (0,0), (-1,-1), C_SURFACE),
+    ("BOX",          (0,0), (-1,-1), 1, C_BORDER),
+    ("INNERGRID",    (0,0), (-1,-1), 0.5, C_BORDER),
+    ("TOPPADDING",   (0,0), (-1,-1), 10),
+    ("BOTTOMPADDING",(0,0), (-1,-1), 10),
+    ("ALIGN",        (0,0), (-1,-1), "CENTER"),
+])
+
+BT_TABLE_STYLE = TableStyle([
+    ("BACKGROUND",    (0,0),  (-1,0),  C_DARK),
+    ("TEXTCOLOR",     (0,0),  (-1,0),  white),
+    ("FONTNAME",      (0,0),  (-1,0),  "Helvetica-Bold"),
+    ("FONTSIZE",      (0,0),  (-1,-1), 10),
+    ("ALIGN",         (1,0),  (-1,-1), "CENTER"),
+    ("ROWBACKGROUNDS",(0,1),  (-1,-1), [white, C_SURFACE]),
+    ("BOX",           (0,0),  (-1,-1), 1, C_BORDER),
+    ("INNERGRID",     (0,0),  (-1,-1), 0.5, C_BORDER),
+    ("TOPPADDING",    (0,0),  (-1,-1), 7),
+    ("BOTTOMPADDING", (0,0),  (-1,-1), 7),
+    ("LEFTPADDING",   (0,0),  (-1,-1), 10),
+])
 
 
 def generate_report(text: str, analysis: dict, explanation: dict, url: str = "") -> BytesIO:
@@ -42,13 +96,11 @@ def generate_report(text: str, analysis: dict, explanation: dict, url: str = "")
 
     # ── Header ────────────────────────────────────────────────────────────────
     story.append(Paragraph(
-        "PsychoGuard AI — Manipulation Analysis Report",
-        _sty("H", fontSize=22, fontName="Helvetica-Bold",
-             textColor=C_DARK, spaceAfter=4)
+        "PsychoGuard AI — Manipulation Analysis Report", S_TITLE
     ))
     story.append(Paragraph(
         f"Generated {datetime.datetime.now().strftime('%B %d, %Y at %H:%M')}",
-        _sty("Sub", fontSize=9, fontName="Helvetica", textColor=C_GRAY, spaceAfter=14)
+        S_SUBTITLE
     ))
     story.append(HRFlowable(width="100%", thickness=2, color=C_ACCENT))
     story.append(Spacer(1, 0.4*cm))
@@ -56,40 +108,24 @@ def generate_report(text: str, analysis: dict, explanation: dict, url: str = "")
     # ── Score overview table ──────────────────────────────────────────────────
     score    = analysis.get("overall_score", 0)
     severity = analysis.get("severity", "LOW")
-    sev_col  = C_RED if severity == "HIGH" else C_AMBER if severity == "MODERATE" else C_GREEN
+    val_sty  = _S_VALUE.get(severity, _S_VALUE["LOW"])
     n_tact   = len(analysis.get("top_tactics", []))
 
-    hdr_sty  = _sty("th", fontSize=9,  fontName="Helvetica-Bold", textColor=C_GRAY, alignment=TA_CENTER)
-    val_sty  = _sty("tv", fontSize=34, fontName="Helvetica-Bold", textColor=sev_col, alignment=TA_CENTER)
-
     ov_data = [
-        [Paragraph("MANIPULATION SCORE", hdr_sty),
-         Paragraph("SEVERITY", hdr_sty),
-         Paragraph("TACTICS FOUND", hdr_sty)],
+        [Paragraph("MANIPULATION SCORE", S_TABLE_HDR),
+         Paragraph("SEVERITY", S_TABLE_HDR),
+         Paragraph("TACTICS FOUND", S_TABLE_HDR)],
         [Paragraph(f"{score}/100", val_sty),
          Paragraph(severity, val_sty),
-         Paragraph(str(n_tact),
-                   _sty("tv2", fontSize=34, fontName="Helvetica-Bold",
-                        textColor=C_ACCENT, alignment=TA_CENTER))]
+         Paragraph(str(n_tact), S_VALUE_ACCENT)]
     ]
     ov_table = Table(ov_data, colWidths=["33%","34%","33%"])
-    ov_table.setStyle(TableStyle([
-        ("BACKGROUND",   (0,0), (-1,-1), C_SURFACE),
-        ("BOX",          (0,0), (-1,-1), 1, C_BORDER),
-        ("INNERGRID",    (0,0), (-1,-1), 0.5, C_BORDER),
-        ("TOPPADDING",   (0,0), (-1,-1), 10),
-        ("BOTTOMPADDING",(0,0), (-1,-1), 10),
-        ("ALIGN",        (0,0), (-1,-1), "CENTER"),
-    ]))
+    ov_table.setStyle(OV_TABLE_STYLE)
     story.append(ov_table)
     story.append(Spacer(1, 0.5*cm))
 
     # ── Tactic breakdown ──────────────────────────────────────────────────────
-    story.append(Paragraph(
-        "Tactic Breakdown",
-        _sty("SH", fontSize=13, fontName="Helvetica-Bold",
-             textColor=C_DARK, spaceAfter=8)
-    ))
+    story.append(Paragraph("Tactic Breakdown", S_SECTION))
 
     tactic_scores = analysis.get("tactic_scores", {})
     trow = [["Tactic", "Score", "Risk"]]
@@ -98,79 +134,43 @@ def generate_report(text: str, analysis: dict, explanation: dict, url: str = "")
         trow.append([tactic, f"{val:.1f}/100", risk])
 
     bt = Table(trow, colWidths=["55%","20%","25%"])
-    bt.setStyle(TableStyle([
-        ("BACKGROUND",    (0,0),  (-1,0),  C_DARK),
-        ("TEXTCOLOR",     (0,0),  (-1,0),  white),
-        ("FONTNAME",      (0,0),  (-1,0),  "Helvetica-Bold"),
-        ("FONTSIZE",      (0,0),  (-1,-1), 10),
-        ("ALIGN",         (1,0),  (-1,-1), "CENTER"),
-        ("ROWBACKGROUNDS",(0,1),  (-1,-1), [white, C_SURFACE]),
-        ("BOX",           (0,0),  (-1,-1), 1, C_BORDER),
-        ("INNERGRID",     (0,0),  (-1,-1), 0.5, C_BORDER),
-        ("TOPPADDING",    (0,0),  (-1,-1), 7),
-        ("BOTTOMPADDING", (0,0),  (-1,-1), 7),
-        ("LEFTPADDING",   (0,0),  (-1,-1), 10),
-    ]))
+    bt.setStyle(BT_TABLE_STYLE)
     story.append(bt)
     story.append(Spacer(1, 0.5*cm))
 
     # ── LLM explanation ───────────────────────────────────────────────────────
-    body_sty = _sty("body", fontSize=10, fontName="Helvetica",
-                    textColor=HexColor("#374151"), leading=15, spaceAfter=6)
-
     if explanation.get("success"):
-        story.append(Paragraph(
-            "AI Analysis (Claude)",
-            _sty("SH2", fontSize=13, fontName="Helvetica-Bold",
-                 textColor=C_DARK, spaceAfter=8)
-        ))
+        story.append(Paragraph("AI Analysis (Claude)", S_SECTION))
         sections = explanation.get("sections", {})
         for heading, content in sections.items():
             if content:
-                story.append(Paragraph(
-                    heading,
-                    _sty(f"sec_{heading}", fontSize=10, fontName="Helvetica-Bold",
-                         textColor=C_ACCENT, spaceAfter=3)
-                ))
-                story.append(Paragraph(content, body_sty))
+                story.append(Paragraph(heading, S_SEC_HEAD))
+                story.append(Paragraph(content, S_BODY))
         if not sections and explanation.get("full_explanation"):
-            story.append(Paragraph(explanation["full_explanation"], body_sty))
+            story.append(Paragraph(explanation["full_explanation"], S_BODY))
         story.append(Spacer(1, 0.3*cm))
 
     # ── Analysed text excerpt ─────────────────────────────────────────────────
     if text:
         story.append(HRFlowable(width="100%", thickness=1, color=C_BORDER))
         story.append(Spacer(1, 0.3*cm))
-        story.append(Paragraph(
-            "Analysed Content (excerpt)",
-            _sty("SH3", fontSize=11, fontName="Helvetica-Bold",
-                 textColor=C_DARK, spaceAfter=6)
-        ))
+        story.append(Paragraph("Analysed Content (excerpt)", S_SECTION_SM))
         excerpt = text[:800] + ("…" if len(text) > 800 else "")
-        story.append(Paragraph(
-            excerpt,
-            _sty("exc", fontSize=9, fontName="Helvetica",
-                 textColor=C_GRAY, leading=13,
-                 backColor=C_SURFACE, leftIndent=8, rightIndent=8,
-                 borderPadding=8)
-        ))
+        story.append(Paragraph(excerpt, S_EXCERPT))
 
     # ── Source URL ────────────────────────────────────────────────────────────
     if url:
         story.append(Spacer(1, 0.3*cm))
-        story.append(Paragraph(
-            f"Source: {url}",
-            _sty("url", fontSize=8, textColor=C_GRAY)
-        ))
+        story.append(Paragraph(f"Source: {url}", S_URL))
 
     # ── Footer ────────────────────────────────────────────────────────────────
     story.append(Spacer(1, 0.5*cm))
     story.append(HRFlowable(width="100%", thickness=1, color=C_BORDER))
     story.append(Paragraph(
         "PsychoGuard AI  ·  Protecting minds from digital manipulation  ·  For research & educational use",
-        _sty("foot", fontSize=7, textColor=C_GRAY, alignment=TA_CENTER)
+        S_FOOTER
     ))
 
     doc.build(story)
     buf.seek(0)
-    return buf
\ No newline at end of file
+    return buf